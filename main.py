@@ -1,21 +1,33 @@
 """
-Simple MoviePy demo (single file)
-=================================
+Simple video effects demo (single file)
+=======================================
 
 • Shows a handful of common effects – each labelled on screen.
-• Easy to add / tweak effects: just write a tiny function and list it in
+• Easy to add / tweak effects: write a tiny builder, register it under a
+  new kind in BUILDERS (with its ffmpeg chain in FILTERS) and list it in
   ANIMATIONS.
 • Background song will loop automatically to match total runtime.
+• Frames are built with NumPy / OpenCV and piped straight into ffmpeg; each
+  effect renders in its own process and ffmpeg then joins the segments
+  without re-encoding.
 
-Tested with MoviePy v2.x and Python 3.12.
+Tested with MoviePy v2.x (only its ffmpeg lookup is used) and Python 3.12.
+Also needs OpenCV (``pip install opencv-python``) for the affine effects.
 """
 
 # ───────────── Imports ─────────────
-from moviepy import ImageClip, TextClip, AudioFileClip, vfx, afx
-from moviepy.video.compositing.CompositeVideoClip import (
-    CompositeVideoClip,
-    concatenate_videoclips,
-)
+import functools
+import os
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+import cv2
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from moviepy.config import FFMPEG_BINARY
 
 # ─────────── Configuration ─────────
 IMAGE_PATH  = "assets/pic.png"
@@ -23,78 +35,417 @@ AUDIO_PATH  = "assets/song.mp3"
 OUTPUT_PATH = "assets/output.mp4"
 
 FPS               = 8          # frame‑rate
+CODEC             = "libx264"
+PRESET            = "ultrafast"  # x264 speed / size trade‑off
+TUNE              = "stillimage"  # every segment is a picture, not footage
+RENDERER          = "frames"   # or "filtergraph": one ffmpeg run, ffmpeg filters
 PER_CLIP_DURATION = 2          # seconds each effect is shown
+MAX_HEIGHT        = 720        # px; larger pictures are scaled down on load
 FONT              = "Arial"
 FONT_SIZE         = 50
 TEXT_COLOR        = "white"
 TEXT_BG           = "black"
+GLOW_MARGIN       = 40         # px of yellow border in "Pulsate Glow"
 
-# ───── Effect helper ─────
-def wrap(*items):
-    """Return a list of effect objects, removing any Nones."""
-    return [e for e in items if e is not None]
-
-# ───── Individual effects (functions that RETURN a list) ─────
-def fade():            return wrap(vfx.FadeIn(0.8), vfx.FadeOut(0.8))
-def slide_left():      return wrap(vfx.SlideIn(0.8, "left"))
-def rotate_180():      return wrap(vfx.Rotate(180))
-def zoom_in():         return wrap(vfx.Resize(lambda t: 1 + 0.25 * (t/PER_CLIP_DURATION)))
-def bw():              return wrap(vfx.BlackAndWhite())
-def blink():           return wrap(vfx.Blink(0.2, 0.2))
-def spin():            return wrap(vfx.Rotate(lambda t: 360 * t / PER_CLIP_DURATION))
-def pulsate():         return wrap(
-                           vfx.Margin(40, color=(255, 255, 0)),
-                           vfx.Blink(0.15, 0.15)
-                       )
-
-# ───── Playlist (label, effect‑function) ─────
-ANIMATIONS = [
-    ("Fade In / Out", fade),
-    ("Slide‑In Left", slide_left),
-    ("Rotate 180°",   rotate_180),
-    ("Zoom‑In",       zoom_in),
-    ("Black & White", bw),
-    ("Blink",         blink),
-    ("Spin 360°",     spin),
-    ("Pulsate Glow",  pulsate),
+X264_ARGS = [
+    "-c:v", CODEC, "-preset", PRESET, "-tune", TUNE, "-threads", "4",
+    "-pix_fmt", "yuv420p",
 ]
 
-# ───── Build clips ─────
-clips = []
-for label, fx_func in ANIMATIONS:
-    base = (
-        ImageClip(IMAGE_PATH)
-        .with_duration(PER_CLIP_DURATION)
-        .with_fps(FPS)
-        .with_effects(fx_func())
+# Decode the picture once; every effect below starts from this array instead
+# of re-reading and re-decoding the PNG for each animation.
+IMAGE = np.asarray(Image.open(IMAGE_PATH).convert("RGB"))
+if IMAGE.shape[0] > MAX_HEIGHT:
+    # Scale down once so every effect works on a video-sized picture, to an
+    # even width as yuv420p needs.
+    width = round(IMAGE.shape[1] * MAX_HEIGHT / IMAGE.shape[0] / 2) * 2
+    IMAGE = cv2.resize(IMAGE, (width, MAX_HEIGHT), interpolation=cv2.INTER_AREA)
+
+# Every segment is centred on one canvas big enough for the glow border, so
+# ffmpeg can join them with a plain stream copy. yuv420p needs even sides,
+# so round each up.
+CANVAS = tuple(
+    side + 2 * GLOW_MARGIN + side % 2 for side in (IMAGE.shape[1], IMAGE.shape[0])
+)
+
+# ───── Labels ─────
+LABEL_FONT = ImageFont.truetype(FONT, FONT_SIZE)
+
+@functools.lru_cache(maxsize=None)
+def label_image(label):
+    """Rasterise ``label`` once with Pillow: TEXT_COLOR on a TEXT_BG box."""
+    left, top, right, bottom = LABEL_FONT.getbbox(label)
+    im = Image.new("RGB", (right - left + 20, bottom - top + 10), TEXT_BG)
+    ImageDraw.Draw(im).text((10 - left, 5 - top), label, fill=TEXT_COLOR, font=LABEL_FONT)
+    return np.asarray(im)
+
+def stamp_label(frame, label):
+    """Copy the opaque label box into the bottom centre of ``frame``."""
+    text = label_image(label)
+    if text.shape[1] > frame.shape[1]:
+        # Wider than the frame: keep the middle of the label.
+        x = (text.shape[1] - frame.shape[1]) // 2
+        text = text[:, x:x + frame.shape[1]]
+    th, tw = text.shape[:2]
+    x0 = (frame.shape[1] - tw) // 2
+    frame[frame.shape[0] - th:, x0:x0 + tw] = text
+    return frame
+
+# ───── Frame tables ─────
+# Effects work on a list of frames: a single entry while the picture is
+# still, or one entry per output frame once something animates.
+FRAMES_PER_CLIP = int(FPS * PER_CLIP_DURATION)
+TIMES = np.arange(FRAMES_PER_CLIP) / FPS
+
+def animate(frames, make_frame):
+    """One frame per output time: ``make_frame(source_frame, t)``."""
+    return [make_frame(frames[i % len(frames)], t) for i, t in enumerate(TIMES)]
+
+def fit_centre(im, w, h):
+    """Centre ``im`` in a black w×h frame, cropping whatever overflows."""
+    out = np.zeros((h, w, 3), np.uint8)
+    ih, iw = im.shape[:2]
+    dy, dx = (h - ih) // 2, (w - iw) // 2
+    ch, cw = min(ih, h), min(iw, w)
+    out[max(dy, 0):max(dy, 0) + ch, max(dx, 0):max(dx, 0) + cw] = (
+        im[max(-dy, 0):max(-dy, 0) + ch, max(-dx, 0):max(-dx, 0) + cw]
     )
-    txt = (
-        TextClip(
-            text=label,
-            font=FONT,
-            font_size=FONT_SIZE,
-            color=TEXT_COLOR,
-            bg_color=TEXT_BG,
-            text_align="center"
+    return out
+
+# ───── Custom effects ─────
+@dataclass
+class CVAffine:
+    """Rotate about the frame centre with OpenCV's warpAffine.
+
+    ``angle`` (degrees, counter‑clockwise) is a function of t; the frame
+    keeps its original size. The whole frame table is allocated once and
+    each frame is warped straight into its slot.
+    """
+
+    angle: Callable
+
+    def apply(self, frames):
+        h, w = frames[0].shape[:2]
+        cx, cy = (w - 1) / 2, (h - 1) / 2
+        out = np.empty((FRAMES_PER_CLIP, h, w, 3), np.uint8)
+        for i, t in enumerate(TIMES):
+            M = cv2.getRotationMatrix2D((cx, cy), self.angle(t), 1.0)
+            cv2.warpAffine(frames[i % len(frames)], M, (w, h), dst=out[i], flags=cv2.INTER_LINEAR)
+        return list(out)
+
+@dataclass
+class Zoom:
+    """Scale about the frame centre by ``scale(t)``, keeping the frame size.
+
+    With no rotation each frame is a separable cv2.resize, cheaper than a
+    general warpAffine, centre‑cropped (or padded) back to size.
+    """
+
+    scale: Callable
+
+    def apply(self, frames):
+        h, w = frames[0].shape[:2]
+
+        def zoom(src, t):
+            s = self.scale(t)
+            scaled = cv2.resize(src, None, fx=s, fy=s, interpolation=cv2.INTER_LINEAR)
+            return fit_centre(scaled, w, h)
+
+        return animate(frames, zoom)
+
+@dataclass
+class Still:
+    """Apply a time‑invariant ``func`` once to each distinct frame (just
+    one, for the plain picture), stored contiguously."""
+
+    func: Callable
+
+    def apply(self, frames):
+        return [np.ascontiguousarray(self.func(f)) for f in frames]
+
+@dataclass
+class SlideIn:
+    """Slide the picture in from the left over ``duration`` seconds."""
+
+    duration: float
+
+    def apply(self, frames):
+        w = frames[0].shape[1]
+
+        def slide(src, t):
+            hidden = int(w * max(1 - t / self.duration, 0))
+            if not hidden:
+                return src
+            out = np.zeros_like(src)
+            out[:, :w - hidden] = src[:, hidden:]
+            return out
+
+        return animate(frames, slide)
+
+@dataclass
+class FadeTable:
+    """Fade in from and out to black.
+
+    The faded frames are built with integer math (``img * a >> 8``) rather
+    than a float multiply each.
+    """
+
+    fade_in: float
+    fade_out: float
+
+    def apply(self, frames):
+        wide = [f.astype(np.uint16) for f in frames]
+        alpha = np.clip(
+            np.minimum(TIMES / self.fade_in, (PER_CLIP_DURATION - TIMES) / self.fade_out), 0, 1
         )
-        .with_duration(PER_CLIP_DURATION)
-        .with_position(("center", "bottom"))
-    )
-    clips.append(CompositeVideoClip([base, txt]))
+        return [
+            ((wide[i % len(wide)] * a) >> 8).astype(np.uint8)
+            for i, a in enumerate((alpha * 256).astype(np.uint16))
+        ]
 
-video = concatenate_videoclips(clips, method="compose")
+@dataclass
+class BlinkFrames:
+    """Alternate between the picture and black.
 
-# ───── Loop background audio ─────
-total_dur = len(clips) * PER_CLIP_DURATION
-audio = AudioFileClip(AUDIO_PATH).with_effects([afx.AudioLoop(duration=total_dur)])
-video = video.with_audio(audio)
+    The black frame is built once and shared, so a blinking still has only
+    two distinct frames.
+    """
+
+    duration_on: float
+    duration_off: float
+
+    def apply(self, frames):
+        off = np.zeros_like(frames[0])
+        period = self.duration_on + self.duration_off
+        return animate(frames, lambda src, t: src if t % period < self.duration_on else off)
+
+def grayscale(im):
+    """Channel mean as 3‑channel uint8, as vfx.BlackAndWhite computes it,
+    but in integer math rather than three float64 passes."""
+    grey = (im.sum(axis=2, dtype=np.uint16) // 3).astype(np.uint8)
+    return np.repeat(grey[..., None], 3, axis=2)
+
+# ───── Effect kinds and their builders ─────
+FADE, SLIDE, ROTATE, ZOOM, BW, BLINK, SPIN, GLOW = range(8)
+
+# Each builder takes its kind's params and returns the effect list. Params
+# are bound as default arguments, so the per‑frame lambdas read locals only.
+def build_fade(fade_in, fade_out):
+    return [FadeTable(fade_in, fade_out)]
+
+def build_slide(duration):
+    return [SlideIn(duration)]
+
+def build_rotate(degrees):
+    """Fixed rotation that keeps the frame size, like ffmpeg's rotate filter:
+    a one‑off array reorder for half turns, otherwise a single warp."""
+    if degrees % 180 == 0:
+        return [Still(lambda im, k=degrees // 90: np.rot90(im, k))]
+
+    def turn(im):
+        h, w = im.shape[:2]
+        M = cv2.getRotationMatrix2D(((w - 1) / 2, (h - 1) / 2), degrees, 1.0)
+        return cv2.warpAffine(im, M, (w, h), flags=cv2.INTER_LINEAR)
+
+    return [Still(turn)]
+
+def build_zoom(growth):
+    return [Zoom(lambda t, g=growth, d=PER_CLIP_DURATION: 1 + g * t / d)]
+
+def build_bw():
+    return [Still(grayscale)]
+
+def build_blink(duration_on, duration_off):
+    return [BlinkFrames(duration_on, duration_off)]
+
+def build_spin(degrees):
+    return [CVAffine(angle=lambda t, a=degrees, d=PER_CLIP_DURATION: a * t / d)]
+
+def build_glow(margin, color, duration_on, duration_off):
+    border = (margin,) * 4
+    return [
+        Still(lambda im: cv2.copyMakeBorder(im, *border, cv2.BORDER_CONSTANT, value=color)),
+        BlinkFrames(duration_on, duration_off),
+    ]
+
+BUILDERS = {
+    FADE:   build_fade,
+    SLIDE:  build_slide,
+    ROTATE: build_rotate,
+    ZOOM:   build_zoom,
+    BW:     build_bw,
+    BLINK:  build_blink,
+    SPIN:   build_spin,
+    GLOW:   build_glow,
+}
+
+# ───── Playlist (label, kind, params) ─────
+ANIMATIONS = [
+    ("Fade In / Out", FADE,   (0.8, 0.8)),
+    ("Slide‑In Left", SLIDE,  (0.8,)),
+    ("Rotate 180°",   ROTATE, (180,)),
+    ("Zoom‑In",       ZOOM,   (0.25,)),
+    ("Black & White", BW,     ()),
+    ("Blink",         BLINK,  (0.2, 0.2)),
+    ("Spin 360°",     SPIN,   (360,)),
+    ("Pulsate Glow",  GLOW,   (GLOW_MARGIN, (255, 255, 0), 0.15, 0.15)),
+]
+
+# ───── ffmpeg filter equivalents ─────
+# For RENDERER = "filtergraph": each kind as an ffmpeg filter chain on the
+# looped picture, so ffmpeg's own (SIMD) filters do all the per‑frame work.
+def blink_filter(duration_on, duration_off):
+    period = duration_on + duration_off
+    return f"drawbox=c=black:t=fill:enable='gte(mod(t,{period}),{duration_on})'"
+
+FILTERS = {
+    FADE:   lambda fade_in, fade_out: (
+                f"fade=t=in:st=0:d={fade_in},"
+                f"fade=t=out:st={PER_CLIP_DURATION - fade_out}:d={fade_out}"
+            ),
+    SLIDE:  lambda duration: f"pad=2*iw:ih,crop=iw/2:ih:x='ow*max(1-t/{duration},0)':y=0",
+    ROTATE: lambda degrees: f"rotate=-{degrees}*PI/180",
+    ZOOM:   lambda growth: (
+                f"zoompan=z='1+{growth}*on/{FRAMES_PER_CLIP}'"
+                f":x='iw/2-iw/zoom/2':y='ih/2-ih/zoom/2'"
+                f":d=1:s={IMAGE.shape[1]}x{IMAGE.shape[0]}:fps={FPS}"
+            ),
+    BW:     lambda: "hue=s=0",
+    BLINK:  blink_filter,
+    SPIN:   lambda degrees: f"rotate=-{degrees}*PI/180*t/{PER_CLIP_DURATION}",
+    GLOW:   lambda margin, color, duration_on, duration_off: (
+                f"pad=iw+{2 * margin}:ih+{2 * margin}:{margin}:{margin}"
+                f":color=0x{bytes(color).hex()},"
+                + blink_filter(duration_on, duration_off)
+            ),
+}
+assert FILTERS.keys() == BUILDERS.keys(), "every effect kind needs a FILTERS entry"
+
+# ───── Build one labelled segment ─────
+def place(frame, label):
+    """Centre ``frame`` on a black CANVAS and stamp the label on top."""
+    return stamp_label(fit_centre(frame, *CANVAS), label)
+
+def build_segment(label, kind, params):
+    """Frames of one segment on CANVAS: a single frame if nothing animates,
+    otherwise one per output frame."""
+    frames = [IMAGE]
+    for fx in BUILDERS[kind](*params):
+        frames = fx.apply(frames)
+    # Effects reuse frame objects (blink has two); place each only once.
+    placed = {}
+    for frame in frames:
+        if id(frame) not in placed:
+            placed[id(frame)] = place(frame, label)
+    return [placed[id(frame)] for frame in frames]
+
+def render_segment(index, path):
+    """Write ANIMATIONS[index] to its own silent mp4 (runs in a worker)."""
+    label, kind, params = ANIMATIONS[index]
+    frames = build_segment(label, kind, params)
+    if len(frames) == 1:
+        # Nothing changes over time: hand ffmpeg the one frame and let it
+        # loop the picture itself.
+        still = os.path.splitext(path)[0] + ".bmp"
+        Image.fromarray(frames[0]).save(still)
+        subprocess.run(
+            [
+                FFMPEG_BINARY, "-y", "-loglevel", "error",
+                "-loop", "1", "-framerate", str(FPS), "-t", str(PER_CLIP_DURATION),
+                "-i", still,
+                *X264_ARGS, path,
+            ],
+            check=True,
+        )
+    else:
+        # Pipe the raw RGB frames straight into the encoder.
+        args = [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{CANVAS[0]}x{CANVAS[1]}",
+            "-framerate", str(FPS), "-i", "-",
+            *X264_ARGS, path,
+        ]
+        with subprocess.Popen(args, stdin=subprocess.PIPE) as proc:
+            for frame in frames:
+                proc.stdin.write(frame)
+            proc.stdin.close()
+        if proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, args)
+    return label
 
 # ───── Render ─────
-video.write_videofile(
-    OUTPUT_PATH,
-    fps=FPS,
-    codec="libx264",
-    audio_codec="aac",
-    preset="medium",
-    threads=4,
-)
\ No newline at end of file
+def render_segments(tmp, total_dur):
+    """Render each segment's frames in a worker, then join them with the song."""
+    segments = [os.path.join(tmp, f"seg_{i}.mp4") for i in range(len(ANIMATIONS))]
+    with ProcessPoolExecutor() as pool:
+        for label in pool.map(render_segment, range(len(ANIMATIONS)), segments):
+            print(f"✓ {label}")
+
+    playlist = os.path.join(tmp, "concat.txt")
+    with open(playlist, "w") as f:
+        f.writelines(f"file '{path}'\n" for path in segments)
+    # Stream-copy the segments and loop the song to the same length,
+    # all in one ffmpeg pass. -stream_loop rewinds the input file, so no
+    # decoded samples are buffered for the loop.
+    subprocess.run(
+        [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            "-f", "concat", "-safe", "0", "-i", playlist,
+            "-stream_loop", "-1", "-i", AUDIO_PATH,
+            "-map", "0:v", "-map", "1:a",
+            "-c:v", "copy", "-c:a", "aac",
+            "-t", str(total_dur),
+            OUTPUT_PATH,
+        ],
+        check=True,
+    )
+
+def render_filtergraph(tmp, total_dur):
+    """Render the whole video in one ffmpeg run from a generated filtergraph.
+
+    Every segment is the looped picture through its FILTERS chain, centred
+    on CANVAS with its label overlaid; the segments are then concatenated.
+    """
+    picture = os.path.join(tmp, "picture.bmp")
+    Image.fromarray(IMAGE).save(picture)
+    loop = ["-loop", "1", "-framerate", str(FPS), "-t", str(PER_CLIP_DURATION), "-i"]
+    inputs, graph = [], []
+    for i, (label, kind, params) in enumerate(ANIMATIONS):
+        text = os.path.join(tmp, f"label_{i}.bmp")
+        Image.fromarray(label_image(label)).save(text)
+        inputs += [*loop, picture, *loop, text]
+        # Start in rgb24: filters working in yuv420p round odd picture sizes
+        # down, while the padded CANVAS is already even.
+        graph.append(
+            f"[{2 * i}:v]format=rgb24,{FILTERS[kind](*params)},"
+            f"pad={CANVAS[0]}:{CANVAS[1]}:(ow-iw)/2:(oh-ih)/2[p{i}];"
+            f"[p{i}][{2 * i + 1}:v]overlay=(W-w)/2:H-h,setsar=1[v{i}]"
+        )
+    graph.append(
+        "".join(f"[v{i}]" for i in range(len(ANIMATIONS)))
+        + f"concat=n={len(ANIMATIONS)}:v=1:a=0[out]"
+    )
+    subprocess.run(
+        [
+            FFMPEG_BINARY, "-y", "-loglevel", "error",
+            *inputs,
+            "-stream_loop", "-1", "-i", AUDIO_PATH,
+            "-filter_complex", ";".join(graph),
+            "-map", "[out]", "-map", f"{2 * len(ANIMATIONS)}:a",
+            *X264_ARGS, "-c:a", "aac",
+            "-t", str(total_dur),
+            OUTPUT_PATH,
+        ],
+        check=True,
+    )
+
+def main():
+    total_dur = len(ANIMATIONS) * PER_CLIP_DURATION
+    with tempfile.TemporaryDirectory() as tmp:
+        if RENDERER == "filtergraph":
+            render_filtergraph(tmp, total_dur)
+        else:
+            render_segments(tmp, total_dur)
+
+if __name__ == "__main__":
+    main()